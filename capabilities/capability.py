@@ -1,11 +1,11 @@
 import abc
 import inspect
-from typing import Union, Type, Dict, Iterable
+from typing import Union, Type, Dict, Iterable, Tuple, Any, Literal, Annotated
 
 import openai
 from openai.types.chat import ChatCompletionToolParam
 from openai.types.chat.completion_create_params import Function
-from pydantic import create_model, BaseModel
+from pydantic import create_model, BaseModel, Field
 
 
 class Capability(abc.ABC):
@@ -18,6 +18,9 @@ class Capability(abc.ABC):
     At the moment, this is not yet a very powerful class, but in the near-term future, this will provide an automated
     way of providing a json schema for the capabilities, which can then be used for function-calling LLMs.
     """
+    # the caches are filled lazily, as dataclass based capabilities do not call the __init__ of this class
+    __slots__ = ("_model_cache", "_json_schema_cache")
+
     @abc.abstractmethod
     def describe(self, name: str = None) -> str:
         """
@@ -41,23 +44,55 @@ class Capability(abc.ABC):
         """
         pass
 
+    @classmethod
+    def get_call_fields(cls) -> Dict[str, Tuple[Type, Any]]:
+        """
+        Returns the parameters of the `__call__` method as pydantic field definitions (mapping the parameter name to a
+        tuple of its annotation and default value).
+        As `inspect.signature` is quite slow and the signature can not change at runtime, the fields are only extracted
+        once per capability class.
+        """
+        if "_call_fields" not in cls.__dict__:
+            params = list(inspect.signature(cls.__call__).parameters.items())[1:]  # skip self
+            cls._call_fields = {param: (param_info.annotation, param_info.default if param_info.default is not inspect._empty else ...) for param, param_info in params}
+        return cls._call_fields
+
     def to_model(self, name: str) -> BaseModel:
         """
         Converts the parameters of the `__call__` function of the capability to a pydantic model, that can be used to
         interface with an LLM using eg instructor or the openAI function calling API.
         The model will have the same name as the capability class and will have the same fields as the `__call__`,
         the `__call__` method can then be accessed by calling the `execute` method of the model.
+        The generated model is cached per name on the instance, as building pydantic models is rather expensive and this
+        is called on every round that sends capabilities to the LLM.
         """
-        sig = inspect.signature(self.__call__)
-        fields = {param: (param_info.annotation, param_info.default if param_info.default is not inspect._empty else ...) for param, param_info in sig.parameters.items()}
-        model_type = create_model(self.__class__.__name__, __doc__=self.describe(name), **fields)
+        if not hasattr(self, "_model_cache"):
+            self._model_cache: Dict[str, Type[BaseModel]] = dict()
+        if name in self._model_cache:
+            return self._model_cache[name]
+
+        model_type = create_model(self.__class__.__name__, __doc__=self.describe(name), **self.get_call_fields())
 
         def execute(model):
-            return self(**model.dict())
+            return self(**model.dict(include=set(self.get_call_fields())))
         model_type.execute = execute
 
+        self._model_cache[name] = model_type
         return model_type
 
+    def to_json_schema(self, name: str) -> Dict:
+        """
+        Returns the json schema of the model generated by `to_model`, which can be used as the parameters of a function
+        definition for the openAI function calling API.
+        Same as the model, the schema is cached per name on the instance, so that it is only generated once and not on
+        every round.
+        """
+        if not hasattr(self, "_json_schema_cache"):
+            self._json_schema_cache: Dict[str, Dict] = dict()
+        if name not in self._json_schema_cache:
+            self._json_schema_cache[name] = self.to_model(name).schema()
+        return self._json_schema_cache[name]
+
 
 # An Action is the base class to allow proper typing information of the generated class in `capabilities_to_action_mode`
 # This description should not be moved into a docstring inside the class, as it will otherwise be provided in the LLM prompt
@@ -75,9 +110,25 @@ def capabilities_to_action_model(capabilities: Dict[str, Capability]) -> Type[Ac
     a union type for the action field.
     This allows the LLM to define an action to be used, which can then simply be called using the `execute` function on
     the model returned from here.
+    If there is more than one capability, each model is tagged with a `capability_name` literal field, so that pydantic
+    can use a discriminated union and directly validate against the correct model, instead of trying all of them.
+    Building the model is rather expensive, so if the capabilities do not change, please create it once and keep it.
     """
+    if len(capabilities) == 1:
+        name, capability = next(iter(capabilities.items()))
+
+        class Model(Action):
+            action: capability.to_model(name)
+
+        return Model
+
+    tagged_models = []
+    for name, capability in capabilities.items():
+        model = capability.to_model(name)
+        tagged_models.append(create_model(model.__name__, __base__=model, __doc__=model.__doc__, capability_name=(Literal[name], ...)))
+
     class Model(Action):
-        action: Union[tuple([capability.to_model(name) for name, capability in capabilities.items()])]
+        action: Annotated[Union[tuple(tagged_models)], Field(discriminator="capability_name")]
 
     return Model
 
@@ -88,7 +139,7 @@ def capabilities_to_functions(capabilities: Dict[str, Capability]) -> Iterable[o
     parameters of the respective capabilities.
     """
     return [
-        Function(name=name, description=capability.describe(name), parameters=capability.to_model(name).schema())
+        Function(name=name, description=capability.describe(name), parameters=capability.to_json_schema(name))
         for name, capability in capabilities.items()
     ]
 
@@ -99,7 +150,7 @@ def capabilities_to_tools(capabilities: Dict[str, Capability]) -> Iterable[opena
     parameters of the respective capabilities.
     """
     return [
-        ChatCompletionToolParam(type="function", function=Function(name=name, description=capability.describe(name), parameters=capability.to_model(name).schema()))
+        ChatCompletionToolParam(type="function", function=Function(name=name, description=capability.describe(name), parameters=capability.to_json_schema(name)))
         for name, capability in capabilities.items()
     ]
 
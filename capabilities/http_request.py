@@ -1,5 +1,6 @@
 import base64
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from http.cookiejar import DefaultCookiePolicy
 from typing import Literal, Optional, Dict
 
 import requests
@@ -7,19 +8,29 @@ import requests
 from capabilities import Capability
 
 
-@dataclass
+@dataclass(slots=True)
 class HTTPRequest(Capability):
     host: str
     follow_redirects: bool = False
     use_cookie_jar: bool = True
+    max_body_bytes: int = 1_000_000
 
-    _client = requests.Session()
+    _client: requests.Session = field(default=None, init=False, repr=False, compare=False)
+    _description: str = field(default="", init=False, repr=False, compare=False)
 
     def __post_init__(self):
+        # a session is used in any case, so that connections to the host are kept alive and reused between requests
+        self._client = requests.Session()
         if not self.use_cookie_jar:
-            self._client = requests
+            self._client.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        # the description only depends on the configuration, so it is only built once
+        self._description = self._build_description()
 
     def describe(self, name: str = None) -> str:
+        return self._description
+
+    def _build_description(self) -> str:
         description = (f"Sends a request to the host {self.host} using the python requests library and returns the response. The schema and host are fixed and do not need to be provided.\n"
                        f"Make sure that you send a Content-Type header if you are sending a body.")
         if self.use_cookie_jar:
@@ -51,11 +62,27 @@ class HTTPRequest(Capability):
                 data=body,
                 headers=headers,
                 allow_redirects=self.follow_redirects,
+                stream=True,
             )
+            # stop reading as soon as we got more than max_body_bytes, so that huge responses neither end up in memory
+            # nor in the prompt
+            with resp:
+                content = bytearray()
+                for chunk in resp.iter_content(chunk_size=64 * 1024):
+                    content += chunk
+                    if len(content) > self.max_body_bytes:
+                        break
         except requests.exceptions.RequestException as e:
             return f"Could not request '{self.host}/{path}?{query}': {e}"
 
+        try:
+            text = content[:self.max_body_bytes].decode(resp.encoding or "utf-8", errors="replace")
+        except LookupError:  # unknown encoding in the response headers
+            text = content[:self.max_body_bytes].decode("utf-8", errors="replace")
+        if len(content) > self.max_body_bytes:
+            text += f"\n<truncated at {self.max_body_bytes} bytes>"
+
         headers = "\r\n".join(f"{k}: {v}" for k, v in resp.headers.items())
 
         # turn the response into "plain text format" for responding to the prompt
-        return f"HTTP/1.1 {resp.status_code} {resp.reason}\r\n{headers}\r\n\r\n{resp.text}"""
+        return f"HTTP/1.1 {resp.status_code} {resp.reason}\r\n{headers}\r\n\r\n{text}"""
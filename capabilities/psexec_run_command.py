@@ -5,7 +5,7 @@ from utils import PSExecConnection
 from .capability import Capability
 
 
-@dataclass
+@dataclass(slots=True)
 class PSExecRunCommand(Capability):
     conn: PSExecConnection
 
@@ -6,7 +6,7 @@ from utils import PSExecConnection
 from .capability import Capability
 
 
-@dataclass
+@dataclass(slots=True)
 class PSExecTestCredential(Capability):
     conn: PSExecConnection
 
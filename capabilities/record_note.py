@@ -4,7 +4,7 @@ from typing import Tuple, List
 from capabilities import Capability
 
 
-@dataclass
+@dataclass(slots=True)
 class RecordNote(Capability):
     registry: List[Tuple[str, str]] = field(default_factory=list)
 
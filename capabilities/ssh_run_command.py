@@ -14,8 +14,11 @@ GOT_ROOT_REXEXPs = [
     re.compile("^bash-[0-9]+.[0-9]# $")
 ]
 
+# used to remove ansi shell codes
+ANSI_ESCAPE_REGEXP = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
 
-@dataclass
+
+@dataclass(slots=True)
 class SSHRunCommand(Capability):
     conn: SSHConnection
 
@@ -36,17 +39,14 @@ class SSHRunCommand(Capability):
         except Exception as e:
             print("TIMEOUT! Could we have become root?")
         out.seek(0)
-        tmp = ""
-        last_line = ""
-        for line in out.readlines():
-            if not line.startswith('[sudo] password for ' + self.conn.username + ':'):
-                line.replace("\r", "")
-                last_line = line
-                tmp = tmp + line
-
-        # remove ansi shell codes
-        ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-        last_line = ansi_escape.sub('', last_line)
+        sudo_prefix = f"[sudo] password for {self.conn.username}:"
+        lines = [line.replace("\r", "") for line in out if not line.startswith(sudo_prefix)]
+        tmp = "".join(lines)
+        last_line = lines[-1] if lines else ""
+
+        # remove ansi shell codes (all of them start with an escape character, so the regex can be skipped without one)
+        if "\x1B" in last_line:
+            last_line = ANSI_ESCAPE_REGEXP.sub('', last_line)
 
         for i in GOT_ROOT_REXEXPs:
             if i.fullmatch(last_line):
@@ -7,7 +7,7 @@ from utils import SSHConnection
 from .capability import Capability
 
 
-@dataclass
+@dataclass(slots=True)
 class SSHTestCredential(Capability):
     conn: SSHConnection
 
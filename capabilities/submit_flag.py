@@ -4,16 +4,23 @@ from typing import Tuple, List, Set, Callable
 from capabilities import Capability
 
 
-@dataclass
+@dataclass(slots=True)
 class SubmitFlag(Capability):
     flag_format: str
     valid_flags: Set[str]
     success_function: Callable[[], None] = None
 
     submitted_valid_flags: Set[str] = field(default_factory=set, init=False)
+    _total_flags: int = field(default=0, init=False, repr=False, compare=False)
+    _description: str = field(default="", init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.valid_flags = frozenset(self.valid_flags)
+        self._total_flags = len(self.valid_flags)
+        self._description = f"Submits a flag, which is the goal of all activities. The flag format is {self.flag_format}. If you find a flag following the that format, that you have not yet submitted, then the most important first step is to submit it, ignoring all other possibilities of further action"
 
     def describe(self, name: str = None) -> str:
-        return f"Submits a flag, which is the goal of all activities. The flag format is {self.flag_format}. If you find a flag following the that format, that you have not yet submitted, then the most important first step is to submit it, ignoring all other possibilities of further action"
+        return self._description
 
     def __call__(self, flag: str) -> str:
         if flag not in self.valid_flags:
@@ -23,10 +30,10 @@ class SubmitFlag(Capability):
             return "Flag already submitted"
 
         self.submitted_valid_flags.add(flag)
-        if len(self.submitted_valid_flags) == len(self.valid_flags):
+        if len(self.submitted_valid_flags) == self._total_flags:
             if self.success_function is not None:
                 self.success_function()
             else:
                 return "All flags submitted, congratulations"
 
-        return f"Flag submitted ({len(self.submitted_valid_flags)}/{len(self.valid_flags)})"
+        return f"Flag submitted ({len(self.submitted_valid_flags)}/{self._total_flags})"
@@ -29,10 +29,13 @@ class Privesc(RoundBasedUseCase, UseCase, abc.ABC):
     
     _sliding_history: SlidingCliHistory = None
     _state: str = ""
+    _state_size: int = 0
     _capabilities: Dict[str, Capability] = field(default_factory=dict)
+    _template_size: int = 0
 
     def init(self):
         super().init()
+        self._template_size = self.llm.count_tokens(template_next_cmd.source)
 
     def setup(self):
         if self.hint != "":
@@ -87,17 +90,15 @@ class Privesc(RoundBasedUseCase, UseCase, abc.ABC):
 
     def get_state_size(self):
         if self.enable_update_state:
-            return self.llm.count_tokens(self._state)
+            return self._state_size
         else:
             return 0
 
     def get_next_command(self):
-        state_size = self.get_state_size()
-        template_size = self.llm.count_tokens(template_next_cmd.source)
-
         history = ''
         if not self.disable_history:
-            history = self._sliding_history.get_history(self.llm.context_size - llm_util.SAFETY_MARGIN - state_size - template_size)
+            state_size = self.get_state_size()
+            history = self._sliding_history.get_history(self.llm.context_size - llm_util.SAFETY_MARGIN - state_size - self._template_size)
 
         cmd = self.llm.get_response(template_next_cmd, _capabilities=self._capabilities, history=history, state=self._state, conn=self.conn, system=self.system, update_state=self.enable_update_state, target_user="root", hint=self.hint)
         cmd.result = llm_util.cmd_output_fixer(cmd.result)
@@ -121,4 +122,6 @@ class Privesc(RoundBasedUseCase, UseCase, abc.ABC):
 
         result = self.llm.get_response(template_state, cmd=cmd, resp=result, facts=self._state)
         self._state = result.result
+        # the state is only changed here, so only count its tokens once instead of every time the size is needed
+        self._state_size = self.llm.count_tokens(self._state)
         return result
\ No newline at end of file
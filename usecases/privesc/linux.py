@@ -1,24 +1,15 @@
 import abc
 import json
-import pathlib
 from dataclasses import dataclass
 
-from mako.template import Template
-
 from capabilities import SSHRunCommand, SSHTestCredential
-from usecases.privesc.common import Privesc
+from usecases.privesc.common import Privesc, template_lse
 from utils import SSHConnection
 from usecases.base import use_case, UseCase
 from utils.console.console import Console
 from utils.db_storage.db_storage import DbStorage
 from utils.openai.openai_llm import OpenAIConnection
 
-template_dir = pathlib.Path(__file__).parent / "templates"
-template_next_cmd = Template(filename=str(template_dir / "query_next_command.txt"))
-template_analyze = Template(filename=str(template_dir / "analyze_cmd.txt"))
-template_state = Template(filename=str(template_dir / "update_state.txt"))
-template_lse = Template(filename=str(template_dir / "get_hint_from_lse.txt"))
-
 @use_case("linux_privesc_hintfile", "Linux Privilege Escalation using a hints file")
 @dataclass
 class PrivescWithHintFile(UseCase, abc.ABC):
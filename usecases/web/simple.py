@@ -1,24 +1,24 @@
+import json
 import time
 from dataclasses import dataclass, field
-from typing import List, Any, Union, Dict
+from typing import Any, Dict, Type
 
 import pydantic_core
-from openai.types.chat import ChatCompletionMessageParam, ChatCompletionMessage
 from rich.panel import Panel
 
 from capabilities import Capability
-from capabilities.capability import capabilities_to_action_model
+from capabilities.capability import Action, capabilities_to_action_model
 from capabilities.http_request import HTTPRequest
 from capabilities.record_note import RecordNote
 from capabilities.submit_flag import SubmitFlag
-from utils import LLMResult, tool_message
+from utils import LLMResult, llm_util, tool_message
 from usecases.base import use_case
 from usecases.common_patterns import RoundBasedUseCase
 from utils.configurable import parameter
 from utils.openai.openai_lib import OpenAILib
+from utils.prompt_history import SlidingPromptHistory
 
 
-Prompt = List[Union[ChatCompletionMessage, ChatCompletionMessageParam]]
 Context = Any
 
 
@@ -31,13 +31,16 @@ class MinimalWebTesting(RoundBasedUseCase):
     flag_template: str = parameter(desc="The template of the flags, whereby {flag} is replaced with the flags", default="FLAG.{flag}.GALF")
     flags: str = parameter(desc="A comma (,) separated list of flags to find", default="hostname,dir,username,rootfile,secretfile,adminpass")
 
-    _prompt_history: Prompt = field(default_factory=list)
+    _prompt_history: SlidingPromptHistory = None
     _context: Context = field(default_factory=lambda: {"notes": list()})
     _capabilities: Dict[str, Capability] = field(default_factory=dict)
+    _action_model: Type[Action] = None
     _all_flags_found: bool = False
+    _tools_size: int = 0
 
     def init(self):
         super().init()
+        self._prompt_history = SlidingPromptHistory(self.llm)
         self._prompt_history.append(
             {
                 "role": "system",
@@ -52,6 +55,11 @@ class MinimalWebTesting(RoundBasedUseCase):
             "http_request": HTTPRequest(self.host),
             "record_note": RecordNote(self._context["notes"]),
         }
+        # the capabilities do not change during the run, so the action model only has to be built once
+        self._action_model = capabilities_to_action_model(self._capabilities)
+        # the schema of the action model is sent with every prompt, so its size is subtracted from the size left for the
+        # history
+        self._tools_size = self.llm.count_tokens(json.dumps(self._action_model.model_json_schema()))
 
     def all_flags_found(self):
         self.console.print(Panel("All flags found! Congratulations!", title="system"))
@@ -59,10 +67,10 @@ class MinimalWebTesting(RoundBasedUseCase):
 
     def perform_round(self, turn: int):
         with self.console.status("[bold green]Asking LLM for a new command..."):
-            prompt = self._prompt_history  # TODO: in the future, this should do some context truncation
+            prompt = self._prompt_history.get_prompt(self.llm.context_size - llm_util.SAFETY_MARGIN - self._tools_size)
 
             tic = time.perf_counter()
-            response, completion = self.llm.instructor.chat.completions.create_with_completion(model=self.llm.model, messages=prompt, response_model=capabilities_to_action_model(self._capabilities))
+            response, completion = self.llm.instructor.chat.completions.create_with_completion(model=self.llm.model, messages=prompt, response_model=self._action_model)
             toc = time.perf_counter()
 
             message = completion.choices[0].message
@@ -1,21 +1,23 @@
+import json
 import time
 from dataclasses import dataclass, field
-from typing import List, Any, Union, Dict
+from typing import Any, Dict
 
-from openai.types.chat import ChatCompletionMessageParam, ChatCompletionMessage
+from openai.types.chat import ChatCompletionMessage
 from rich.panel import Panel
 
 from capabilities import Capability
+from capabilities.capability import capabilities_to_tools
 from capabilities.http_request import HTTPRequest
 from capabilities.submit_flag import SubmitFlag
-from utils import LLMResult, tool_message
-from usecases.usecase import use_case
-from usecases.usecase.roundbased import RoundBasedUseCase
+from utils import LLMResult, llm_util, tool_message
+from usecases.base import use_case
+from usecases.common_patterns import RoundBasedUseCase
 from utils.configurable import parameter
 from utils.openai.openai_lib import OpenAILib
+from utils.prompt_history import SlidingPromptHistory
 
 
-Prompt = List[Union[ChatCompletionMessage, ChatCompletionMessageParam]]
 Context = Any
 
 
@@ -28,13 +30,15 @@ class WebTestingWithExplanation(RoundBasedUseCase):
     flag_template: str = parameter(desc="The template of the flags, whereby {flag} is replaced with the flags", default="FLAG.{flag}.GALF")
     flags: str = parameter(desc="A comma (,) separated list of flags to find", default="hostname,dir,username,rootfile,secretfile,adminpass")
 
-    _prompt_history: Prompt = field(default_factory=list)
+    _prompt_history: SlidingPromptHistory = None
     _context: Context = field(default_factory=lambda: {"notes": list()})
     _capabilities: Dict[str, Capability] = field(default_factory=dict)
     _all_flags_found: bool = False
+    _tools_size: int = 0
 
     def init(self):
         super().init()
+        self._prompt_history = SlidingPromptHistory(self.llm)
         self._prompt_history.append(
             {
                 "role": "system",
@@ -49,13 +53,15 @@ class WebTestingWithExplanation(RoundBasedUseCase):
             "submit_flag": SubmitFlag(self.flag_format_description, set(self.flag_template.format(flag=flag) for flag in self.flags.split(",")), success_function=self.all_flags_found),
             "http_request": HTTPRequest(self.host),
         }
+        # the tool definitions are sent with every prompt, so their size is subtracted from the size left for the history
+        self._tools_size = self.llm.count_tokens(json.dumps(capabilities_to_tools(self._capabilities)))
 
     def all_flags_found(self):
         self.console.print(Panel("All flags found! Congratulations!", title="system"))
         self._all_flags_found = True
 
     def perform_round(self, turn: int):
-        prompt = self._prompt_history  # TODO: in the future, this should do some context truncation
+        prompt = self._prompt_history.get_prompt(self.llm.context_size - llm_util.SAFETY_MARGIN - self._tools_size)
 
         result: LLMResult = None
         stream = self.llm.stream_response(prompt, self.console, capabilities=self._capabilities)
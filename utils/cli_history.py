@@ -1,3 +1,5 @@
+from typing import List, Tuple
+
 from utils.llm_util import LLM, trim_result_front
 
 
@@ -6,14 +8,45 @@ class SlidingCliHistory:
     model: LLM = None
     maximum_target_size: int = 0
     sliding_history: str = ''
+    # (approximate) token count of the sliding history, kept up to date incrementally, so that the whole history does
+    # not need to be tokenized again every round
+    history_size: int = 0
 
     def __init__(self, used_model: LLM):
         self.model = used_model
         self.maximum_target_size = self.model.context_size
+        # the commands of the sliding history together with their token counts, so that the history can be cut down to
+        # a target size by only tokenizing the single command that has to be trimmed
+        self._entries: List[Tuple[str, int]] = []
 
     def add_command(self, cmd: str, output: str):
-        self.sliding_history += f"$ {cmd}\n{output}"
-        self.sliding_history = trim_result_front(self.model, self.maximum_target_size, self.sliding_history)
+        entry = f"$ {cmd}\n{output}"
+        self._entries.append((entry, self.model.count_tokens(entry)))
+        self.history_size += self._entries[-1][1]
+
+        if self.history_size > self.maximum_target_size:
+            self._entries = self._cut_entries(self.maximum_target_size)
+            self.history_size = sum(size for _, size in self._entries)
+            self.sliding_history = "".join(entry for entry, _ in self._entries)
+        else:
+            self.sliding_history += entry
+
+    def get_history(self, target_size: int) -> str:
+        target_size = min(self.maximum_target_size, target_size)
+        if self.history_size <= target_size:
+            return self.sliding_history
+        return "".join(entry for entry, _ in self._cut_entries(target_size))
 
-    def get_history(self, target_size:int) -> str:
-        return trim_result_front(self.model, min(self.maximum_target_size, target_size), self.sliding_history)
+    def _cut_entries(self, target_size: int) -> List[Tuple[str, int]]:
+        # same as trimming the joined history, the oldest commands are kept
+        entries = []
+        remaining = target_size
+        for entry, size in self._entries:
+            if size > remaining:
+                if remaining > 0:
+                    entry = trim_result_front(self.model, remaining, entry)
+                    entries.append((entry, self.model.count_tokens(entry)))
+                break
+            entries.append((entry, size))
+            remaining -= size
+        return entries
@@ -6,7 +6,8 @@ from dataclasses import dataclass
 from openai.types.chat import ChatCompletionSystemMessageParam, ChatCompletionUserMessageParam, ChatCompletionToolMessageParam, ChatCompletionAssistantMessageParam, ChatCompletionFunctionMessageParam
 
 SAFETY_MARGIN = 128
-STEP_CUT_TOKENS = 128
+MAX_CHARS_PER_TOKEN = 8
+TARGET_SIZE_FACTOR = 3
 
 
 @dataclass
@@ -96,28 +97,28 @@ def cmd_output_fixer(cmd: str) -> str:
 # this is ugly, but basically we only have an approximation how many tokens
 # we are currently using. So we cannot just cut down to the desired size
 # what we're doing is:
-#   - take our current token count
-#   - use the minimum of (current_count, desired count *2)
-#     - this get's us roughly in the ballpark of the desired size
-#     - as long as we assume that 2 * desired-count will always be larger
-#       than the unschaerfe introduced by the string-.token conversion
-#   - do a 'binary search' to cut-down to the desired size afterwards
+#   - cut the result down to MAX_CHARS_PER_TOKEN * desired count characters
+#     before tokenizing anything
+#     - a token is roughly 4 characters on average, so this still leaves us
+#       above the desired size, but we never tokenize more than that
+#   - estimate the characters per token from the current result and cut off
+#     the characters of the surplus tokens (plus a token, so that we do not
+#     creep towards the desired size) until we reach the desired size
 #
 # this should reduce the time needed to do the string->token conversion
 # as this can be long-running if the LLM puts in a 'find /' output
 def trim_result_front(model: LLM, target_size: int, result: str) -> str:
+    max_chars = max(0, MAX_CHARS_PER_TOKEN * target_size)
+    if len(result) > TARGET_SIZE_FACTOR * max_chars:
+        print(f"big step trim-down from {len(result)} to {max_chars} characters")
+    result = result[:max_chars]
     cur_size = model.count_tokens(result)
-    TARGET_SIZE_FACTOR = 3
-    if cur_size > TARGET_SIZE_FACTOR * target_size:
-        print(f"big step trim-down from {cur_size} to {2 * target_size}")
-        result = result[:TARGET_SIZE_FACTOR * target_size]
-        cur_size = model.count_tokens(result)
 
-    while cur_size > target_size:
+    while cur_size > target_size and len(result) > 0:
         print(f"need to trim down from {cur_size} to {target_size}")
         diff = cur_size - target_size
-        step = int((diff + STEP_CUT_TOKENS) / 2)
+        step = max(1, int((diff + 1) * len(result) / cur_size))
         result = result[:-step]
         cur_size = model.count_tokens(result)
 
-    return result
\ No newline at end of file
+    return result
@@ -1,6 +1,6 @@
 import time
 from dataclasses import dataclass
-from typing import Dict, Union, Iterable, Optional
+from typing import Dict, Union, Iterable, Optional, List
 
 import instructor
 from rich.console import Console
@@ -17,6 +17,11 @@ import openai
 
 from utils.configurable import parameter
 
+# the streamed output is printed in batches, as printing every single delta through the rich console is a lot slower
+# than the stream itself. The window is short enough to still look like a continuous stream
+STREAM_OUTPUT_INTERVAL = 0.025
+STREAM_OUTPUT_CHARS = 8192
+
 
 @configurable("openai-lib", "OpenAI Library based connection")
 @dataclass
@@ -93,23 +98,42 @@ class OpenAILib(LLM):
         state = None
         message = ChatCompletionMessage(role="assistant", content="", tool_calls=[])
         usage: Optional[CompletionUsage] = None
+        # the deltas are collected and only joined once the stream is done, as concatenating them onto the message
+        # copies the whole accumulated content for every chunk
+        content_parts: List[str] = []
+        arguments_parts: List[List[str]] = []
+        output_parts: List[str] = []
+        output_chars = 0
+        last_output = time.monotonic()
+
+        def flush_output():
+            nonlocal output_chars, last_output
+            if output_parts:
+                console.print("".join(output_parts), end="", markup=False, highlight=False)
+                output_parts.clear()
+            output_chars = 0
+            last_output = time.monotonic()
 
         for chunk in chunks:
             outputs = 0
             if len(chunk.choices) > 0:
                 if len(chunk.choices) > 1:
+                    flush_output()
                     print("WARNING: Got more than one choice in the stream response")
 
                 delta = chunk.choices[0].delta
                 if delta.role is not None and delta.role != message.role:
+                    flush_output()
                     print(f"WARNING: Got a role change to '{delta.role}' in the stream response")
 
                 if delta.content is not None:
-                    message.content += delta.content
+                    content_parts.append(delta.content)
                     if state != "content":
                         state = "content"
+                        flush_output()
                         console.print("\n\n[bold blue]ASSISTANT:[/bold blue]")
-                    console.print(delta.content, end="")
+                    output_parts.append(delta.content)
+                    output_chars += len(delta.content)
                     outputs += 1
 
                 if delta.tool_calls is not None and len(delta.tool_calls) > 0:
@@ -118,26 +142,41 @@ class OpenAILib(LLM):
                     for tool_call in delta.tool_calls:
                         if len(message.tool_calls) <= tool_call.index:
                             if len(message.tool_calls) != tool_call.index:
+                                flush_output()
                                 print(f"WARNING: Got a tool call with index {tool_call.index} but expected {len(message.tool_calls)}")
                                 return
+                            flush_output()
                             console.print(f"\n\n[bold red]TOOL CALL - {tool_call.function.name}:[/bold red]")
-                            message.tool_calls.append(ChatCompletionMessageToolCall(id=tool_call.id, function=Function(name=tool_call.function.name, arguments=tool_call.function.arguments), type="function"))
-                        console.print(tool_call.function.arguments, end="")
-                        message.tool_calls[tool_call.index].function.arguments += tool_call.function.arguments
+                            message.tool_calls.append(ChatCompletionMessageToolCall(id=tool_call.id, function=Function(name=tool_call.function.name, arguments=""), type="function"))
+                            arguments_parts.append([])
+                        output_parts.append(tool_call.function.arguments)
+                        output_chars += len(tool_call.function.arguments)
+                        arguments_parts[tool_call.index].append(tool_call.function.arguments)
                         outputs += 1
 
             if chunk.usage is not None:
                 usage = chunk.usage
 
+            # the interval is only checked when a chunk arrives, so output buffered right before the stream stalls is only
+            # shown once the stream continues (or ends)
+            if output_chars >= STREAM_OUTPUT_CHARS or time.monotonic() - last_output >= STREAM_OUTPUT_INTERVAL:
+                flush_output()
+
             if outputs > 1:
+                flush_output()
                 print("WARNING: Got more than one output in the stream response")
             yield chunk
 
+        flush_output()
         console.print()
         if usage is None:
             print("WARNING: Did not get usage information in the stream response")
             usage = CompletionUsage(completion_tokens=0, prompt_tokens=0, total_tokens=0)
 
+        message.content = "".join(content_parts)
+        for tool_call, arguments in zip(message.tool_calls, arguments_parts):
+            tool_call.function.arguments = "".join(arguments)
+
         if len(message.tool_calls) == 0:  # the openAI API does not like getting empty tool call lists
             message.tool_calls = None
 
@@ -153,4 +192,10 @@ class OpenAILib(LLM):
         pass
 
     def encode(self, query) -> list[int]:
-        return tiktoken.encoding_for_model(self.model).encode(query)
+        try:
+            encoding = tiktoken.encoding_for_model(self.model)
+        except KeyError:
+            # models that tiktoken does not know (non-openAI models, or ones newer than the installed tiktoken) are
+            # approximated with the gpt-3.5-turbo / gpt-4 encoding
+            encoding = tiktoken.get_encoding("cl100k_base")
+        return encoding.encode(query)
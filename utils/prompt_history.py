@@ -0,0 +1,68 @@
+from typing import List, Union
+
+from openai.types.chat import ChatCompletionMessage, ChatCompletionMessageParam
+
+from utils.llm_util import LLM
+
+Prompt = List[Union[ChatCompletionMessage, ChatCompletionMessageParam]]
+
+# every message is wrapped in a few tokens of framing by the API, which are not part of its text
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class SlidingPromptHistory:
+    """
+    Keeps the messages of a chat based use case together with their (approximate) token counts, so that the prompt can
+    be cut down to a target size every round without tokenizing the whole history again.
+
+    The first message (the system prompt) is always kept, from the remaining messages only the latest ones are kept.
+    The history is never cut right before a tool message, as the API does not accept tool results without the assistant
+    message containing the tool call.
+    """
+
+    def __init__(self, used_model: LLM):
+        self.model = used_model
+        self.history_size = 0
+        self._messages: Prompt = []
+        self._sizes: List[int] = []
+
+    def append(self, message: Union[ChatCompletionMessage, ChatCompletionMessageParam]):
+        self._messages.append(message)
+        self._sizes.append(MESSAGE_OVERHEAD_TOKENS + self.model.count_tokens(_message_text(message)))
+        self.history_size += self._sizes[-1]
+
+    def get_prompt(self, target_size: int) -> Prompt:
+        if self.history_size <= target_size:
+            return list(self._messages)
+
+        # walk back from the newest message, as long as the messages fit into the target size. If not even the newest
+        # round fits, it is still sent, as there would be nothing to answer to otherwise
+        start = None
+        remaining = target_size - self._sizes[0]
+        for i in range(len(self._messages) - 1, 0, -1):
+            remaining -= self._sizes[i]
+            if remaining < 0 and start is not None:
+                break
+            if _message_role(self._messages[i]) != "tool":
+                start = i
+
+        if start is None:
+            return list(self._messages)
+        return self._messages[:1] + self._messages[start:]
+
+
+def _message_role(message: Union[ChatCompletionMessage, ChatCompletionMessageParam]) -> str:
+    if isinstance(message, dict):
+        return message["role"]
+    return message.role
+
+
+def _message_text(message: Union[ChatCompletionMessage, ChatCompletionMessageParam]) -> str:
+    # everything that is sent for a message (apart from the fixed framing), so that its size can be counted
+    if isinstance(message, dict):
+        return message["role"] + (message.get("tool_call_id") or "") + (message.get("content") or "")
+
+    text = message.role + (message.content or "")
+    for tool_call in message.tool_calls or []:
+        text += tool_call.id + tool_call.type + tool_call.function.name + tool_call.function.arguments
+    return text